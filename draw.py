@@ -13,242 +13,1838 @@ Date Created: September, 2023
 
 Python required version: 3.6
 Dependencies:
-- python libs: anytree, rich
-- software: Graphviz (available at https://graphviz.org/download/)
+- python libs: rich
+- optional python libs: anytree (conversion of the trees), pyahocorasick
+- software: Graphviz (available at https://graphviz.org/download/), except with --backend svg
 Note: Make sure to add Graphviz to the PATH at the installation.
 
 For usage instructions, run with --help.
 """
 
 import argparse
+import heapq
+import html
 import logging
+import mmap
 import subprocess
 import re
 import sys
 
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import suppress
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
 
-from anytree import Node, RenderTree
-from anytree.exporter import DotExporter
 from rich.logging import RichHandler
 
+try:
+    from anytree import Node
+except ImportError:  # anytree is only needed to convert the trees with to_anytree
+    Node = None
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional, FilterMatcher has its own automaton
+    ahocorasick = None
+
+
+# Columns of a wt line: instructions, child instructions, [depth] and indented function
+WT_LINE_REGEX = r" *([0-9]+) +([0-9]+) \[ *([0-9]+)\] +([^ \t\r\n\f\v]+)"
+# Same columns, anchored on every line start of a text chunk
+WT_LINE_PATTERN = re.compile("^" + WT_LINE_REGEX, re.MULTILINE)
+# Number of characters of the text read at once, cut after the last complete line
+TEXT_CHUNK_SIZE = 1 << 22
+# Same columns, anchored on every line start of a raw bytes buffer
+WT_LINE_BYTES_PATTERN = re.compile(
+    b"(?:^|(?<=\r))" + WT_LINE_REGEX.encode("ascii"), re.MULTILINE
+)
+
+# Characters making a filter word a wildcard pattern instead of a plain substring
+WILDCARDS = frozenset("*?")
+# Colors of the nodes of the modules, by order of appearance of the modules in the trace
+MODULE_COLORS = (
+    "lightblue",
+    "thistle",
+    "wheat",
+    "darkseagreen",
+    "darksalmon",
+    "papayawhip",
+    "rosybrown",
+    "lightcoral",
+    "tan",
+    "cadetblue",
+    "plum",
+)
+DEFAULT_COLOR = "grey"
+# Backreferences to a group by number or by name, and conditional groups, in a regex
+BACKREFERENCE_PATTERN = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+# Characters to escape in the quoted identifiers of the dot language
+DOT_ESCAPE_PATTERN = re.compile(r'["\\]')
+# Number of reductions of the trees tried when Graphviz exceeds the render timeout
+DEGRADATION_LEVELS = 3
+# Engines for the graphs too large for the default layout of dot, by nodes + edges
+DOT_MAX_GRAPH_SIZE = 10000
+LIMITED_DOT_MAX_GRAPH_SIZE = 40000
+LIMITED_DOT_OPTIONS = ("-Gnslimit=2", "-Gnslimit1=2", "-Gmclimit=0.5")
+LARGE_GRAPH_ENGINE = "sfdp"
+# Translation of the marks of focus_tree into a mask of the kept nodes
+FOCUS_MASK_TABLE = bytes([0]) + bytes([1]) * 255
+# Dimensions in pixels of the svg trees: monospace font, boxes and gaps between them
+SVG_FONT_SIZE = 12
+SVG_CHAR_WIDTH = 7.2
+SVG_BOX_HEIGHT = 24
+SVG_BOX_PADDING = 8
+SVG_SIBLING_GAP = 8
+SVG_LEVEL_GAP = 40
+
+# Summary printed by wt at the end of the trace, followed by per-function statistics
+WT_SUMMARY_MARKER = b" instructions were executed in "
+WT_SUMMARY_PATTERN = re.compile(
+    r" *([0-9]+) instructions were executed in ([0-9]+) events"
+)
+WT_STATS_ROW_PATTERN = re.compile(
+    r" *(\S.*?) +([0-9]+) +([0-9]+) +([0-9]+) +([0-9]+) *$"
+)
+
+
+class FunctionStats(NamedTuple):
+    """Statistics of a function, as reported in the summary of wt."""
+
+    invocations: int
+    min_instructions: int
+    max_instructions: int
+    avg_instructions: int
+
+
+class WtSummary(NamedTuple):
+    """Summary printed by wt at the end of a trace."""
+
+    instructions: int
+    events: int
+    functions: dict  # module!function_name -> FunctionStats
+
+
+class SymbolTable:
+    """Interned names of the functions of a trace, within the format module!function_name.
+
+    Each unique name is stored once and referred to by an integer symbol. The modules of the names
+    are numbered in order of appearance.
+    """
+
+    __slots__ = ("names", "modules", "symbol_modules", "ids", "module_ids")
+
+    def __init__(self):
+        self.names = []  # module!function_name of each symbol
+        self.modules = []  # unique module names
+        self.symbol_modules = array("I")  # index in modules of each symbol
+        self.ids = {}  # module!function_name -> symbol
+        self.module_ids = {}  # module name -> index in modules
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, name: str) -> int:
+        """Return the symbol of a function name, adding it to the table the first time it is seen.
+
+        Args:
+            name (str): the function name within the format module!function_name
+
+        Returns:
+            int: the symbol of the function
+        """
+        symbol = self.ids.get(name)
+        if symbol is None:
+            # A name without module is its own module
+            module = name.rpartition("!")[0] or name
+
+            module_id = self.module_ids.get(module)
+            if module_id is None:
+                module_id = len(self.modules)
+                self.module_ids[module] = module_id
+                self.modules.append(module)
+
+            symbol = len(self.names)
+            self.ids[name] = symbol
+            self.names.append(name)
+            self.symbol_modules.append(module_id)
+
+        return symbol
+
 
-# Global variable containing the list of unique MODULES_LIST
-MODULES_LIST = []
+# Global symbol table shared by all the trees of the trace
+SYMBOLS = SymbolTable()
 
 
-def determine_node_att(node: Node) -> str:
-    """Determine the attributes of a given node.
+class CallTree:
+    """Call tree stored as a structure of arrays.
+
+    Nodes are integer indexes, numbered in the order of the wt output (pre-order), the root being 0.
+    Each node only costs a few dozen bytes, split between the following arrays.
+    """
+
+    __slots__ = (
+        "parents",
+        "depths",
+        "functions",
+        "first_children",
+        "last_children",
+        "next_siblings",
+        "subtree_ends",
+        "exclusive",
+        "inclusive",
+        "symbols",
+    )
+
+    def __init__(self, symbols: SymbolTable):
+        self.parents = array("i")  # -1 for the root
+        self.depths = array("I")
+        self.functions = array("I")  # symbol in the symbol table
+        self.first_children = array("i")  # -1 for a leaf
+        self.last_children = array("i")
+        self.next_siblings = array("i")  # -1 for the last child
+        self.subtree_ends = array("i")  # node after the last descendant, in pre-order
+        self.exclusive = array("Q")  # instructions executed by the call itself
+        self.inclusive = array("Q")  # instructions executed with the children
+        self.symbols = symbols
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def add_node(
+        self,
+        parent: int,
+        function: int,
+        depth: int,
+        instructions: int,
+        child_instructions: int,
+    ) -> int:
+        """Add a call as the last child of a node.
+
+        Args:
+            parent (int): the node calling the function, -1 for the root
+            function (int): the symbol of the function called
+            depth (int): the depth level of the call
+            instructions (int): instructions executed by the call itself so far
+            child_instructions (int): instructions executed by the children of the call so far
+
+        Returns:
+            int: the node of the call
+        """
+        node = len(self.parents)
+
+        self.parents.append(parent)
+        self.depths.append(depth)
+        self.functions.append(function)
+        self.first_children.append(-1)
+        self.last_children.append(-1)
+        self.next_siblings.append(-1)
+        self.subtree_ends.append(node + 1)
+        self.exclusive.append(instructions)
+        self.inclusive.append(instructions + child_instructions)
+
+        if parent != -1:
+            if self.first_children[parent] == -1:
+                self.first_children[parent] = node
+            else:
+                self.next_siblings[self.last_children[parent]] = node
+            self.last_children[parent] = node
+
+        return node
+
+    def set_cost(self, node: int, instructions: int, child_instructions: int) -> None:
+        """Record on a node the instruction counts of the latest wt line of its call.
+
+        wt prints the line of a call again each time one of its children returns, with updated
+        counts: the last line of a call holds its final counts.
+
+        Args:
+            node (int): the node of the call
+            instructions (int): instructions executed by the call itself so far
+            child_instructions (int): instructions executed by the children of the call so far
+        """
+        self.exclusive[node] = instructions
+        self.inclusive[node] = instructions + child_instructions
+
+    def index_subtrees(self) -> None:
+        """Compute the end of the subtree of every node, once the tree is complete.
+
+        Nodes being numbered in pre-order, the subtree of a node spans the interval from the node to
+        its subtree end: a single reverse sweep propagates the ends from the children to the parents.
+        """
+        parents = self.parents
+        subtree_ends = self.subtree_ends
+        for node in range(len(parents) - 1, 0, -1):
+            parent = parents[node]
+            if subtree_ends[node] > subtree_ends[parent]:
+                subtree_ends[parent] = subtree_ends[node]
+
+    def name(self, node: int) -> str:
+        """Return the name of the function called by a node, within the format module!function_name."""
+        return self.symbols.names[self.functions[node]]
+
+    def children(self, node: int, kept_nodes: bytearray = None) -> Iterator[int]:
+        """Iterate over the children of a node, in call order.
+
+        Args:
+            node (int): the parent node
+            kept_nodes (bytearray): (opt) mask of the nodes of a filtered view of the tree
+        """
+        child = self.first_children[node]
+        while child != -1:
+            if kept_nodes is None or kept_nodes[child]:
+                yield child
+            child = self.next_siblings[child]
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate a wildcard filter into a regex matching whole function names.
 
     Args:
-        node (Node): a given node of a tree
+        pattern (str): the filter, where '*' matches any characters and '?' any single character.
+            Without module ('Rtlp*Heap'), it applies to the function part of the names, otherwise
+            ('ntdll!Rtlp*') to the whole names.
 
     Returns:
-        string: the attributes of a node including its color, shape and style.
+        str: the equivalent regex, anchored at both ends of the names
     """
-    colors = [
-        "lightblue",
-        "thistle",
-        "wheat",
-        "darkseagreen",
-        "darksalmon",
-        "papayawhip",
-        "rosybrown",
-        "lightcoral",
-        "tan",
-        "cadetblue",
-        "plum",
-    ]
-    module_node = node.name.split("!")[0]
+    if "!" in pattern:
+        any_chars, any_char = ".*", "."
+    else:  # Wildcards must not match across the module separator
+        any_chars, any_char = "[^!]*", "[^!]"
+
+    regex = "".join(
+        any_chars if char == "*" else any_char if char == "?" else re.escape(char)
+        for char in pattern
+    )
+    if "!" not in pattern:
+        regex = f"(?:.*!)?{regex}"
+
+    return rf"\A(?:{regex})\Z"
+
+
+def compile_filter_patterns(patterns: list) -> list:
+    """Compile filter regexes, combined into a single alternation whenever possible.
+
+    Plain groups are only renumbered once combined, but regexes with backreferences, named
+    groups or global inline flags would change meaning: they are compiled separately.
+
+    Args:
+        patterns (list): the regexes to compile
+
+    Returns:
+        list: the compiled patterns, the combined alternation first
+
+    Raises:
+        re.error: if a regex is invalid
+    """
+    default_flags = re.compile("").flags
+    combinable = []
+    separate = []
+    for regex in patterns:
+        pattern = re.compile(regex)
+        if (
+            pattern.groupindex
+            or pattern.flags != default_flags
+            or BACKREFERENCE_PATTERN.search(regex)
+        ):
+            separate.append(pattern)
+        else:
+            combinable.append(regex)
+
+    if combinable:
+        separate.insert(0, re.compile("|".join(f"(?:{regex})" for regex in combinable)))
+
+    return separate
+
+
+class FilterMatcher:
+    """Matcher finding whether a function name contains any word of a list of filters.
+
+    The plain words are compiled once into an Aho-Corasick automaton, so that each name is matched
+    in a single pass whatever the number of filters. The automaton of pyahocorasick is used if
+    installed. Wildcard filters ('ntdll!Rtlp*') and regex filters are combined into a single
+    alternation, so that they cost one regex search per name, see compile_filter_patterns.
+    The verdict of each symbol is cached for the whole matcher, and for each of its words and
+    patterns in FILTER_VERDICTS, so that the verdicts are shared with the matchers of other
+    sets of filters having words in common, like the nested filter levels.
+    """
+
+    __slots__ = (
+        "matches_all",
+        "words",
+        "patterns",
+        "word_verdicts",
+        "pattern_verdicts",
+        "automaton",
+        "transitions",
+        "fallbacks",
+        "outputs",
+        "verdicts",
+    )
+
+    def __init__(self, filters_list: list, regex_filters: list = ()):
+        # Per symbol: 0 if not matched yet, 1 if no match, 2 if match
+        self.verdicts = bytearray()
+        # As str.find, an empty word matches every name
+        self.matches_all = "" in filters_list
+        self.words = list(
+            dict.fromkeys(
+                word for word in filters_list if word and not WILDCARDS & set(word)
+            )
+        )
+
+        patterns = [
+            glob_to_regex(word) for word in filters_list if WILDCARDS & set(word)
+        ]
+        patterns.extend(regex_filters)
+        self.patterns = compile_filter_patterns(patterns)
+
+        self.word_verdicts = [
+            FILTER_VERDICTS.setdefault(("word", word), bytearray())
+            for word in self.words
+        ]
+        self.pattern_verdicts = [
+            FILTER_VERDICTS.setdefault(
+                ("pattern", pattern.pattern, pattern.flags), bytearray()
+            )
+            for pattern in self.patterns
+        ]
+
+        if ahocorasick is not None:
+            self.automaton = ahocorasick.Automaton()
+            for index, word in enumerate(self.words):
+                self.automaton.add_word(word, index)
+            self.automaton.make_automaton()
+            return
+
+        self.automaton = None
+        # Trie of the words: state 0 is the root, each state holds the indexes of the words
+        # it ends
+        self.transitions = [{}]
+        self.outputs = [()]
+        for index, word in enumerate(self.words):
+            state = 0
+            for char in word:
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][char] = next_state
+                    self.transitions.append({})
+                    self.outputs.append(())
+                state = next_state
+            self.outputs[state] += (index,)
+
+        # Fallback of each state to its longest proper suffix, computed breadth-first
+        self.fallbacks = [0] * len(self.transitions)
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.fallbacks[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fallbacks[fallback]
+                fallback = self.transitions[fallback].get(char, 0)
+                self.fallbacks[next_state] = fallback
+                self.outputs[next_state] += self.outputs[fallback]
+
+    def matches(self, name: str) -> bool:
+        """Return True if the name contains at least one of the filters words or matches a pattern."""
+        if self.matches_all:
+            return True
+
+        for pattern in self.patterns:
+            if pattern.search(name):
+                return True
+
+        if self.automaton is not None:
+            if not len(self.automaton):
+                return False
+            for _ in self.automaton.iter(name):
+                return True
+            return False
+
+        transitions = self.transitions
+        fallbacks = self.fallbacks
+        outputs = self.outputs
+        state = 0
+        for char in name:
+            while state and char not in transitions[state]:
+                state = fallbacks[state]
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                return True
+
+        return False
+
+    def matching_words(self, name: str) -> set:
+        """Return the indexes of all the filters words contained in the name."""
+        if self.automaton is not None:
+            if not len(self.automaton):
+                return set()
+            return {index for _, index in self.automaton.iter(name)}
+
+        transitions = self.transitions
+        fallbacks = self.fallbacks
+        outputs = self.outputs
+        matched = set()
+        state = 0
+        for char in name:
+            while state and char not in transitions[state]:
+                state = fallbacks[state]
+            state = transitions[state].get(char, 0)
+            matched.update(outputs[state])
+
+        return matched
+
+    def matches_filters(self, symbol: int, symbols: SymbolTable) -> bool:
+        """Return True if the name of the symbol matches the filters, using the verdicts of
+        each word and pattern, and recording the ones not known yet.
+
+        Args:
+            symbol (int): the symbol of the function
+            symbols (SymbolTable): the table the symbol belongs to, SYMBOLS for the shared verdicts
+        """
+        if self.matches_all:
+            return True
+
+        # A match recorded by any matcher sharing a word or a pattern is enough
+        for filter_verdicts in self.word_verdicts + self.pattern_verdicts:
+            if symbol >= len(filter_verdicts):
+                filter_verdicts.extend(bytes(len(symbols) - len(filter_verdicts)))
+            if filter_verdicts[symbol] == 2:
+                return True
+
+        name = symbols.names[symbol]
+        if any(not word_verdicts[symbol] for word_verdicts in self.word_verdicts):
+            matched = self.matching_words(name)
+            for index, word_verdicts in enumerate(self.word_verdicts):
+                word_verdicts[symbol] = 2 if index in matched else 1
+            if matched:
+                return True
+
+        for pattern, pattern_verdicts in zip(self.patterns, self.pattern_verdicts):
+            if not pattern_verdicts[symbol]:
+                pattern_verdicts[symbol] = 2 if pattern.search(name) else 1
+            if pattern_verdicts[symbol] == 2:
+                return True
+
+        return False
+
+    def matches_symbol(self, symbol: int, symbols: SymbolTable) -> bool:
+        """Return True if the name of the symbol matches the filters, using the cached verdicts.
+
+        Args:
+            symbol (int): the symbol of the function
+            symbols (SymbolTable): the table the symbol belongs to, always the same for a matcher
+        """
+        verdicts = self.verdicts
+        if symbol >= len(verdicts):
+            verdicts.extend(bytes(len(symbols) - len(verdicts)))
+
+        verdict = verdicts[symbol]
+        if not verdict:
+            verdict = 2 if self.matches_filters(symbol, symbols) else 1
+            verdicts[symbol] = verdict
+
+        return verdict == 2
+
+
+# Filter matchers compiled for the symbols of SYMBOLS, by set of filters and regexes
+FILTER_MATCHERS = {}
+# Verdicts of each filter word or pattern for the symbols of SYMBOLS, shared between the
+# matchers: ("word", word) or ("pattern", regex, flags) -> per symbol, 0 if not matched yet,
+# 1 if no match, 2 if match
+FILTER_VERDICTS = {}
+
+
+def get_filter_matcher(filters_list: list, regex_filters: list = ()) -> FilterMatcher:
+    """Return the matcher of a list of filters, reusing the one of a previous filtering if any.
 
-    for module in MODULES_LIST:
-        if module_node == module:
-            index = list(MODULES_LIST).index(module_node)
-            if index >= len(colors):
-                return "shape=box, style=filled, fillcolor = grey"
+    Args:
+        filters_list (list): function names to filter out
+        regex_filters (list): (opt) regexes of function names to filter out
+
+    Returns:
+        FilterMatcher: the matcher of the filters, along with its cached verdicts
+    """
+    key = (frozenset(filters_list), frozenset(regex_filters))
+    matcher = FILTER_MATCHERS.get(key)
+    if matcher is None:
+        matcher = FilterMatcher(filters_list, regex_filters)
+        FILTER_MATCHERS[key] = matcher
+
+    return matcher
+
+
+def to_anytree(tree: CallTree, kept_nodes: bytearray = None) -> Node:
+    """Convert a call tree into anytree nodes, for the code relying on anytree.
+
+    Args:
+        tree (CallTree): the tree to convert
+        kept_nodes (bytearray): (opt) mask of the nodes of a filtered view of the tree to convert
+
+    Returns:
+        Node: the root of the converted tree, None if the tree is empty
+    """
+    if Node is None:
+        raise ImportError("anytree is required to convert the call tree.")
+
+    nodes = [None] * len(tree)
+    for node in range(len(tree)):
+        if kept_nodes is not None and not kept_nodes[node]:
+            continue
+
+        parent = tree.parents[node]
+        nodes[node] = Node(
+            tree.name(node),
+            parent=nodes[parent] if parent != -1 else None,
+            symbol=tree.functions[node],
+            exclusive=tree.exclusive[node],
+            inclusive=tree.inclusive[node],
+        )
 
-            return f"shape=box, style=filled, fillcolor = {colors[index]}"
+    return nodes[0] if nodes else None
 
-    raise ValueError(f"Couldn't retrieve attribute of node: {module_node}.")
 
+def determine_node_att(symbol: int) -> str:
+    """Determine the attributes of the node of a given function.
 
-def adding_to_module_list(function_module: str) -> None:
-    """Build a list of unique Windows module involved in the tree.
+    Args:
+        symbol (int): the symbol of the function of the node
+
+    Returns:
+        string: the attributes of a node including its color, shape and style.
+    """
+    return f"shape=box, style=filled, fillcolor = {determine_node_color(symbol)}"
+
+
+def determine_node_color(symbol: int) -> str:
+    """Determine the color of the node of a given function, the same as in the dot graphs.
 
     Args:
-        function_module (str): an entry of the tree within the format module!function_name
+        symbol (int): the symbol of the function of the node
+
+    Returns:
+        string: the name of the color of the module of the function
     """
-    module_node = function_module.split("!")[0]
+    module_id = SYMBOLS.symbol_modules[symbol]
+    if module_id < len(MODULE_COLORS):
+        return MODULE_COLORS[module_id]
 
-    if module_node:
-        if module_node not in MODULES_LIST:
-            MODULES_LIST.append(module_node)
+    return DEFAULT_COLOR
 
 
 def adding_to_tree(
-    tree: Node, curr_node: Node, curr_lvl: int, index: int, function: str
-) -> (Node, Node, int):
+    tree: CallTree,
+    curr_node: int,
+    curr_lvl: int,
+    index: int,
+    function: int,
+    instructions: int,
+    child_instructions: int,
+) -> (int, int):
     """Process a given lines from the wt output and adds it to the tree.
 
+    Lines returning to a call already in the tree update its exclusive and inclusive instruction
+    totals instead of adding a node.
+
     Args:
-        my_tree (Tree): the tree to update
-        curr_node (Node): the last node of the tree seen
+        tree (CallTree): the tree to update
+        curr_node (int): the last node of the tree seen, -1 if the tree is empty
         current_level (int): the last depth level seen
         index (int): the depth level of the entry to add to the tree
-        function (str): the entry name to add to the tree within the format module!function_name
+        function (int): the symbol of the entry to add to the tree
+        instructions (int): instructions executed by the entry itself, as counted by wt
+        child_instructions (int): instructions executed by the children of the entry, as counted by wt
 
     Returns:
-        my_tree (Tree): updated version of the tree
-        curr_node (Node): the node just added to the tree
+        curr_node (int): the node just added to the tree
         current_level (int): the level of the node just added to the tree
     """
 
     if index == 0:
-        if tree is None:  # If the very first line is being processed
-            tree = Node(function)
-            curr_node = tree
+        if not tree:  # If the very first line is being processed
+            curr_node = tree.add_node(-1, function, 0, instructions, child_instructions)
             curr_lvl = 0
-        else:
-            pass
+        else:  # Return to the root
+            tree.set_cost(0, instructions, child_instructions)
+            curr_node, curr_lvl = 0, 0
     elif index == curr_lvl + 1:
-        curr_node = Node(function, parent=curr_node)
+        curr_node = tree.add_node(
+            curr_node, function, index, instructions, child_instructions
+        )
         curr_lvl += 1
     # in case WinDbg skips  intermediary parent level
     elif index < curr_lvl:
         for i in range(curr_lvl - index):
-            curr_node = curr_node.parent
+            curr_node = tree.parents[curr_node]
         curr_lvl = index
+        if function == tree.functions[curr_node]:
+            tree.set_cost(curr_node, instructions, child_instructions)
+        else:  # A new call at the level of the ancestor
+            curr_node = tree.add_node(
+                tree.parents[curr_node],
+                function,
+                index,
+                instructions,
+                child_instructions,
+            )
     elif index == curr_lvl:
-        curr_node = Node(function, parent=curr_node.parent)
+        # A new call always starts without child instructions: otherwise wt is returning
+        # to the last call, whose children were not added to the tree (depth limit)
+        if child_instructions and function == tree.functions[curr_node]:
+            tree.set_cost(curr_node, instructions, child_instructions)
+        else:
+            curr_node = tree.add_node(
+                tree.parents[curr_node],
+                function,
+                index,
+                instructions,
+                child_instructions,
+            )
     else:
         raise ValueError(
-            f"Couldn't add entry {curr_lvl, function} to node {index, curr_node.name}."
+            f"Couldn't add entry {curr_lvl, tree.symbols.names[function]} to node "
+            f"{index, tree.name(curr_node)}."
         )
 
-    return tree, curr_node, curr_lvl
+    return curr_node, curr_lvl
 
 
-def parse_input_file(wt_output_file: Path, filter_level: int) -> list:
-    """Open the file containing wt output and parses relevant lines with a depth <= to filter level.
+def scan_text_file(
+    wt_output_file: Path, symbols: SymbolTable, max_depth: int = None
+) -> Iterator[tuple]:
+    """Read the file containing wt output in large chunks and yield every line matching the wt columns.
+
+    Each chunk ends with a complete line, the incomplete last line being carried over to the next
+    chunk, and all its lines are matched by a single regex scan.
 
     Args:
-        wt_output_file (Path): path of the file to parse
-        filter_level (int): maximum depth of the line to parse
+        wt_output_file (Path): path of the file to scan
+        symbols (SymbolTable): the table interning the function names
+        max_depth (int): (opt) maximum depth of the lines to yield, None for every depth
 
-    Returns:
-        list: parsed lines from wt_output_files, to add to tree
+    Yields:
+        tuple: (depth, symbol, instructions, child_instructions) of each matching line, in file order
     """
+    find_lines = WT_LINE_PATTERN.findall
+    known_symbols = symbols.ids
+
     with open(wt_output_file, "r", encoding="utf-8") as wt_data:
-        data = wt_data.readlines()
+        remainder = ""
+        at_end = False
+        while not at_end:
+            chunk = wt_data.read(TEXT_CHUNK_SIZE)
+            at_end = not chunk
+            chunk = remainder + chunk
+            if not at_end:
+                end = chunk.rfind("\n") + 1
+                chunk, remainder = chunk[:end], chunk[end:]
+
+            for instructions, child_instructions, depth, function in find_lines(chunk):
+                depth = int(depth)
+                if max_depth is not None and depth > max_depth:
+                    continue
+
+                symbol = known_symbols.get(function)
+                if symbol is None:
+                    symbol = symbols.intern(function)
+                yield depth, symbol, int(instructions), int(child_instructions)
+
+
+def scan_mapped_file(
+    wt_output_file: Path, symbols: SymbolTable, max_depth: int = None
+) -> Iterator[tuple]:
+    """Memory-map the file containing wt output and yield every line matching the wt columns.
+
+    The file is scanned as raw bytes: only the function name of the matching lines is decoded,
+    and each unique name is decoded once.
+
+    Args:
+        wt_output_file (Path): path of the file to scan
+        symbols (SymbolTable): the table interning the function names
+        max_depth (int): (opt) maximum depth of the lines to yield, None for every depth
+
+    Yields:
+        tuple: (depth, symbol, instructions, child_instructions) of each matching line, in file order
+    """
+    with open(wt_output_file, "rb") as wt_data:
+        if Path(wt_output_file).stat().st_size == 0:  # An empty file can't be mapped
+            return
+
+        with mmap.mmap(wt_data.fileno(), 0, access=mmap.ACCESS_READ) as wt_bytes:
+            decoded_symbols = {}
+            for match in WT_LINE_BYTES_PATTERN.finditer(wt_bytes):
+                instructions, child_instructions, depth, raw_function = match.groups()
+                depth = int(depth)
+                if max_depth is not None and depth > max_depth:
+                    continue
+
+                symbol = decoded_symbols.get(raw_function)
+                if symbol is None:
+                    symbol = symbols.intern(raw_function.decode("utf-8"))
+                    decoded_symbols[raw_function] = symbol
+                yield depth, symbol, int(instructions), int(child_instructions)
+
+
+def split_line_ranges(wt_output_file: Path, count: int) -> list:
+    """Split the file containing wt output into byte ranges made of whole lines.
+
+    Args:
+        wt_output_file (Path): path of the file to split
+        count (int): number of ranges wanted, less ranges are returned for small files
+
+    Returns:
+        list: (start, end) byte offsets of each range, in file order
+    """
+    size = Path(wt_output_file).stat().st_size
+    if size == 0:
+        return []
+
+    bounds = [0]
+    with open(wt_output_file, "rb") as wt_data:
+        with mmap.mmap(wt_data.fileno(), 0, access=mmap.ACCESS_READ) as wt_bytes:
+            for i in range(1, count):
+                # Move each cut to the start of the next line
+                newline = wt_bytes.find(b"\n", max(size * i // count, bounds[-1]))
+                if newline == -1:
+                    break
+                if newline + 1 < size:
+                    bounds.append(newline + 1)
+    bounds.append(size)
+
+    return list(zip(bounds, bounds[1:]))
+
+
+def scan_file_range(
+    wt_output_file: Path, start: int, end: int, max_depth: int = None
+) -> tuple:
+    """Scan a byte range of the file containing wt output, in a worker process.
+
+    Args:
+        wt_output_file (Path): path of the file to scan
+        start (int): offset of the first line of the range
+        end (int): offset following the last line of the range
+        max_depth (int): (opt) maximum depth of the lines to keep, None for every depth
+
+    Returns:
+        tuple: (depths, name_ids, instructions, child_instructions, names): compact arrays holding
+        the depth, the index of the function name and the instruction counts of each matching line,
+        and the list of unique names they refer to
+    """
+    depths = array("I")
+    name_ids = array("I")
+    instructions = array("Q")
+    child_instructions = array("Q")
+    names = []
+    name_index = {}
+
+    with open(wt_output_file, "rb") as wt_data:
+        with mmap.mmap(wt_data.fileno(), 0, access=mmap.ACCESS_READ) as wt_bytes:
+            for match in WT_LINE_BYTES_PATTERN.finditer(wt_bytes, start, end):
+                line_instructions, line_child_instructions, depth, raw_function = (
+                    match.groups()
+                )
+                depth = int(depth)
+                if max_depth is not None and depth > max_depth:
+                    continue
+
+                name_id = name_index.get(raw_function)
+                if name_id is None:
+                    name_id = len(names)
+                    name_index[raw_function] = name_id
+                    names.append(raw_function.decode("utf-8"))
+                depths.append(depth)
+                name_ids.append(name_id)
+                instructions.append(int(line_instructions))
+                child_instructions.append(int(line_child_instructions))
+
+    return depths, name_ids, instructions, child_instructions, names
+
+
+def scan_file_in_parallel(
+    wt_output_file: Path, symbols: SymbolTable, jobs: int, max_depth: int = None
+) -> Iterator[tuple]:
+    """Scan the file containing wt output by ranges of lines dispatched to a pool of processes.
 
-    parsed_lines = []
-    for line in data:
-        if re.search(r"\[  [0-" + str(filter_level) + "].*$", line):
-            words = line.split()
-            # Retreive function's name and depth
-            index = int(words[3].replace("]", ""))
-            function = words[4]
-            parsed_lines.append([index, function])
+    Args:
+        wt_output_file (Path): path of the file to scan
+        symbols (SymbolTable): the table interning the function names
+        jobs (int): number of worker processes
+        max_depth (int): (opt) maximum depth of the lines to yield, None for every depth
 
-            # Add the module to the list of known MODULES_LIST
-            adding_to_module_list(function)
+    Yields:
+        tuple: (depth, symbol, instructions, child_instructions) of each matching line, in file order
+    """
+    # More ranges than workers, so that an unevenly dense range doesn't hold up the pool
+    ranges = iter(split_line_ranges(wt_output_file, jobs * 4))
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # At most 2 ranges per worker are scanned ahead, to bound the records in memory
+        chunks = deque(
+            executor.submit(scan_file_range, wt_output_file, start, end, max_depth)
+            for start, end in islice(ranges, jobs * 2)
+        )
+        # Records are consumed in the order of the ranges, as if read sequentially
+        while chunks:
+            depths, name_ids, instructions, child_instructions, names = (
+                chunks.popleft().result()
+            )
+            next_range = next(ranges, None)
+            if next_range is not None:
+                chunks.append(
+                    executor.submit(
+                        scan_file_range, wt_output_file, *next_range, max_depth
+                    )
+                )
+
+            chunk_symbols = [symbols.intern(name) for name in names]
+            for depth, name_id, line_instructions, line_child_instructions in zip(
+                depths, name_ids, instructions, child_instructions
+            ):
+                yield (
+                    depth,
+                    chunk_symbols[name_id],
+                    line_instructions,
+                    line_child_instructions,
+                )
+
+
+def parse_input_file(
+    wt_output_file: Path, filter_level: int, memory_map: bool = False, jobs: int = 1
+) -> Iterator[tuple]:
+    """Stream the file containing wt output and yield relevant lines with a depth <= to filter level.
+
+    Lines are read and parsed one at a time, so that the whole log never has to be held in memory.
 
-    if not parsed_lines:
+    Args:
+        wt_output_file (Path): path of the file to parse
+        filter_level (int): maximum depth of the line to parse, None to parse every depth
+        memory_map (bool): (opt) scan the memory-mapped file as bytes instead of text lines
+        jobs (int): (opt) number of processes scanning the memory-mapped file in parallel
+
+    Function names are interned in the global symbol table SYMBOLS.
+
+    Yields:
+        tuple: (depth, symbol, instructions, child_instructions) of each parsed line from
+        wt_output_file, in file order
+
+    Raises:
+        ValueError: if no line of the file could be parsed
+    """
+    # Lines are filtered by depth before their names are interned, so that the modules
+    # of the functions which aren't drawn don't take colors
+    if jobs > 1:
+        records = scan_file_in_parallel(wt_output_file, SYMBOLS, jobs, filter_level)
+    elif memory_map:
+        records = scan_mapped_file(wt_output_file, SYMBOLS, filter_level)
+    else:
+        records = scan_text_file(wt_output_file, SYMBOLS, filter_level)
+
+    is_empty = True
+
+    for record in records:
+        is_empty = False
+        yield record
+
+    if is_empty:
         raise ValueError(f"Couldn't parse input file:{wt_output_file}.")
 
-    return parsed_lines
 
+def parse_summary(wt_output_file: Path) -> WtSummary:
+    """Parse the summary printed by wt at the end of the file containing wt output.
 
-def generate_tree(data: list, filters_list: list) -> Node:
-    """Generate from a parsed wt output a tree filtering out function names matching the list of words given in the variable filters if any.
+    Only the end of the file, from the summary onwards, is decoded and parsed.
 
     Args:
-        data (list): lines containing the wt output
-        filters (list): (opt) function names to filter out from tree
+        wt_output_file (Path): path of the file to parse
 
     Returns:
-        Node: tree resulting from the wt output
+        WtSummary: the summary of the trace, None if the file doesn't contain any
     """
-    tree = None
-    curr_node = None
-    curr_lvl = 0
-    next_index = None
+    if Path(wt_output_file).stat().st_size == 0:  # An empty file can't be mapped
+        return None
 
-    for entry in data:
-        index = entry[0]
-        function = entry[1]
+    with open(wt_output_file, "rb") as wt_data:
+        with mmap.mmap(wt_data.fileno(), 0, access=mmap.ACCESS_READ) as wt_bytes:
+            marker = wt_bytes.rfind(WT_SUMMARY_MARKER)
+            if marker == -1:
+                return None
+            start = wt_bytes.rfind(b"\n", 0, marker) + 1
+            footer = wt_bytes[start:].decode("utf-8")
 
-        if filters_list is not None:
-            if (
-                next_index is not None and index > next_index
-            ):  # if function is a child of a filtered node
-                continue
+    lines = footer.splitlines()
+    match = WT_SUMMARY_PATTERN.match(lines[0])
+    if match is None:
+        return None
+
+    functions = {}
+    for line in lines[1:]:
+        row = WT_STATS_ROW_PATTERN.match(line)
+        if row is not None:
+            functions[row.group(1)] = FunctionStats(*map(int, row.group(2, 3, 4, 5)))
+
+    return WtSummary(int(match.group(1)), int(match.group(2)), functions)
+
+
+def check_summary_totals(summary: WtSummary, tree: CallTree) -> bool:
+    """Cross-check the instruction totals computed in a full tree against the summary of wt.
+
+    Args:
+        summary (WtSummary): the summary of the trace
+        tree (CallTree): the full tree built from the same trace
+
+    Returns:
+        bool: True if the root of the tree accounts for all the instructions of the summary
+    """
+    if tree.inclusive[0] != summary.instructions:
+        logging.warning(
+            "[-] The tree accounts for %d instructions, while wt reports %d.",
+            tree.inclusive[0],
+            summary.instructions,
+        )
+        return False
+
+    return True
 
-            next_index = None
-            is_valid_node = True
-            for individual_filter in filters_list:
-                if function.find(individual_filter) != -1:
-                    is_valid_node = False
-                    next_index = index  # Flag to skip lines until the parent node
-                    break
 
-            if is_valid_node is False:  # if passes the filtering step
+def filter_tree(
+    tree: CallTree, filters_list: list, regex_filters: list = ()
+) -> bytearray:
+    """Compute the view of a tree filtering out function names matching the list of words given in the variable filters.
+
+    Nodes are visited in pre-order, jumping from a filtered out node straight to the end of its
+    subtree: the cost is proportional to the number of nodes kept.
+
+    Args:
+        tree (CallTree): the full tree, with its subtrees indexed
+        filters (list): function names to filter out from tree
+        regex_filters (list): (opt) regexes of function names to filter out from tree
+
+    Returns:
+        bytearray: mask of the nodes kept in the filtered tree
+    """
+    matcher = get_filter_matcher(filters_list, regex_filters)
+    functions = tree.functions
+    subtree_ends = tree.subtree_ends
+    kept_nodes = bytearray(len(tree))
+
+    node = 0
+    while node < len(kept_nodes):
+        if matcher.matches_symbol(functions[node], tree.symbols):
+            node = subtree_ends[node]  # Skip the node and all its descendants
+        else:
+            kept_nodes[node] = 1
+            node += 1
+
+    return kept_nodes
+
+
+def focus_tree(
+    tree: CallTree,
+    focus_words: list,
+    kept_nodes: bytearray = None,
+    with_subtrees: bool = False,
+) -> bytearray:
+    """Compute the view of a tree keeping only the call paths leading to functions matching the focus words.
+
+    A single reverse sweep over the nodes marks the matching nodes and their ancestors, children
+    being numbered after their parent.
+
+    Args:
+        tree (CallTree): the full tree, with its subtrees indexed
+        focus_words (list): function names to focus on, with the same syntax as the filters
+        kept_nodes (bytearray): (opt) mask of the nodes of a filtered view to focus
+        with_subtrees (bool): (opt) keep as well the whole subtrees of the matching nodes
+
+    Returns:
+        bytearray: mask of the nodes kept in the focused view
+    """
+    matcher = get_filter_matcher(focus_words)
+    parents = tree.parents
+    functions = tree.functions
+    # 1 for the ancestors of a match, 2 for a match
+    focused_nodes = bytearray(len(tree))
+
+    for node in range(len(tree) - 1, -1, -1):
+        if kept_nodes is not None and not kept_nodes[node]:
+            continue
+
+        if matcher.matches_symbol(functions[node], tree.symbols):
+            focused_nodes[node] = 2
+        elif not focused_nodes[node]:
+            continue
+
+        parent = parents[node]
+        if parent != -1 and not focused_nodes[parent]:
+            focused_nodes[parent] = 1
+
+    if with_subtrees:
+        node = 0
+        while node < len(focused_nodes):
+            if focused_nodes[node] != 2:
+                node += 1
                 continue
 
-        tree, curr_node, curr_lvl = adding_to_tree(
-            tree, curr_node, curr_lvl, index, function
+            end = tree.subtree_ends[node]
+            for descendant in range(node, end):
+                if kept_nodes is None or kept_nodes[descendant]:
+                    focused_nodes[descendant] = 1
+            node = end
+
+    return focused_nodes.translate(FOCUS_MASK_TABLE)
+
+
+def prune_tree(
+    tree: CallTree,
+    kept_nodes: bytearray = None,
+    min_inclusive: int = 0,
+    top_k_children: int = None,
+) -> bytearray:
+    """Compute the view of a tree without its cheap subtrees.
+
+    The root is always kept. The subtrees of the removed nodes are removed with them.
+
+    Args:
+        tree (CallTree): the full tree, with its subtrees indexed
+        kept_nodes (bytearray): (opt) mask of the nodes of a filtered view to prune
+        min_inclusive (int): (opt) minimum number of instructions executed by a kept call and its children
+        top_k_children (int): (opt) number of the heaviest children kept for each node
+
+    Returns:
+        bytearray: mask of the nodes kept in the pruned view
+    """
+    if kept_nodes is not None:
+        pruned_nodes = bytearray(kept_nodes)
+    else:
+        pruned_nodes = bytearray(b"\x01" * len(tree))
+    inclusive = tree.inclusive
+    subtree_ends = tree.subtree_ends
+
+    # Pre-order walk, the children of a node being pruned before they are visited
+    node = 0
+    while node < len(pruned_nodes):
+        if not pruned_nodes[node]:
+            node = subtree_ends[node]
+            continue
+
+        if node and inclusive[node] < min_inclusive:
+            end = subtree_ends[node]
+            pruned_nodes[node:end] = bytes(end - node)
+            node = end
+            continue
+
+        if top_k_children is not None:
+            children = list(tree.children(node, pruned_nodes))
+            if len(children) > top_k_children:
+                heaviest = set(
+                    heapq.nlargest(top_k_children, children, key=inclusive.__getitem__)
+                )
+                for child in children:
+                    if child not in heaviest:
+                        end = subtree_ends[child]
+                        pruned_nodes[child:end] = bytes(end - child)
+        node += 1
+
+    return pruned_nodes
+
+
+def generate_tree(
+    data: Iterable[tuple], filters_list: list, regex_filters: list = ()
+) -> (CallTree, bytearray):
+    """Generate from a parsed wt output the full tree, and the view of the tree filtering out function names matching the list of words given in the variable filters if any.
+
+    The wt output is parsed once: the filtered tree is a mask over the nodes of the full tree,
+    the descendants of a filtered out node being filtered out as well.
+
+    Args:
+        data (Iterable[tuple]): parsed lines of the wt output, as yielded by parse_input_file
+        filters (list): (opt) function names to filter out from tree
+        regex_filters (list): (opt) regexes of function names to filter out from tree
+
+    Returns:
+        CallTree: full tree resulting from the wt output
+        bytearray: mask of the nodes kept in the filtered tree, None without filters
+    """
+    tree = CallTree(SYMBOLS)
+    curr_node = -1
+    curr_lvl = 0
+
+    for entry in data:
+        index, function, instructions, child_instructions = entry
+
+        curr_node, curr_lvl = adding_to_tree(
+            tree,
+            curr_node,
+            curr_lvl,
+            index,
+            function,
+            instructions,
+            child_instructions,
         )
+    tree.index_subtrees()
+
+    if filters_list is None:
+        return tree, None
 
-    return tree
+    return tree, filter_tree(tree, filters_list, regex_filters)
 
 
-def display_console_tree(tree) -> None:
+def display_console_tree(tree: CallTree, kept_nodes: bytearray = None) -> None:
     """Display on the console the tree given in args.
 
     Args:
-    tree (Tree): tree to display in the console
+    tree (CallTree): tree to display in the console
+    kept_nodes (bytearray): (opt) mask of the nodes of the filtered view of the tree to display
     """
     logging.info("Overview of the filtered tree:")
 
-    for pre, _, node in RenderTree(tree):
-        print(f"{pre}{node.name}")
+    # Depth-first walk, each entry holding the prefixes of the node and of its children
+    stack = [(0, "", "")] if tree and (kept_nodes is None or kept_nodes[0]) else []
+    while stack:
+        node, pre, fill = stack.pop()
+        print(f"{pre}{tree.name(node)} ({tree.inclusive[node]} instructions)")
+
+        children = list(tree.children(node, kept_nodes))
+        for position in range(len(children) - 1, -1, -1):
+            if position == len(children) - 1:
+                stack.append((children[position], fill + "└── ", fill + "    "))
+            else:
+                stack.append((children[position], fill + "├── ", fill + "│   "))
     print("\n")
 
 
-def generate_png(
-    directory_path: Path, tree_type: str, tree: list, direction: str
+def display_stats_report(summary: WtSummary) -> None:
+    """Display on the console the per-function statistics of the summary of wt.
+
+    Functions are sorted by the total of instructions they executed over all their invocations.
+
+    Args:
+        summary (WtSummary): the summary of the trace
+    """
+    logging.info(
+        "%d instructions were executed in %d events.",
+        summary.instructions,
+        summary.events,
+    )
+
+    functions = sorted(
+        summary.functions.items(),
+        key=lambda item: item[1].invocations * item[1].avg_instructions,
+        reverse=True,
+    )
+    width = max([len("Function Name")] + [len(name) for name, _ in functions])
+
+    print(
+        f"{'Function Name':<{width}} {'Invocations':>11} {'MinInst':>9} {'MaxInst':>9} "
+        f"{'AvgInst':>9} {'TotalInst':>11}"
+    )
+    for name, stats in functions:
+        print(
+            f"{name:<{width}} {stats.invocations:>11} {stats.min_instructions:>9} "
+            f"{stats.max_instructions:>9} {stats.avg_instructions:>9} "
+            f"{stats.invocations * stats.avg_instructions:>11}"
+        )
+    print("\n")
+
+
+def write_dot(
+    dot_file,
+    tree: CallTree,
+    direction: str,
+    kept_nodes: bytearray = None,
+    label: str = None,
+) -> None:
+    """Write a tree in the dot language, each function being a single node of the graph.
+
+    Each function and each call from a function to another are written once, when first met
+    in the tree, so that the output grows with the number of unique calls, not of calls.
+
+    Args:
+        dot_file: text file to write the graph to
+        tree (CallTree): tree to write
+        direction (str): direction of the tree: 'LR' (default) or 'TB'
+        kept_nodes (bytearray): (opt) mask of the nodes of a filtered view of the tree to write
+        label (str): (opt) label of the graph, displayed on top of it
+    """
+    functions = tree.functions
+    parents = tree.parents
+    subtree_ends = tree.subtree_ends
+    identifiers = {}  # Quoted dot identifier of each function written
+    edges_seen = set()
+
+    dot_file.write(f"digraph tree {{\n    rankdir={direction};\n")
+    if label is not None:
+        label = DOT_ESCAPE_PATTERN.sub(r"\\\g<0>", label)
+        dot_file.write(f'    label="{label}";\n    labelloc=t;\n')
+
+    node = 0
+    while node < len(tree):
+        if kept_nodes is not None and not kept_nodes[node]:
+            node = subtree_ends[node]
+            continue
+
+        symbol = functions[node]
+        if symbol not in identifiers:
+            name = DOT_ESCAPE_PATTERN.sub(r"\\\g<0>", tree.symbols.names[symbol])
+            identifiers[symbol] = f'"{name}"'
+            dot_file.write(
+                f"    {identifiers[symbol]} [{determine_node_att(symbol)}];\n"
+            )
+
+        parent = parents[node]
+        if parent != -1 and (functions[parent], symbol) not in edges_seen:
+            edges_seen.add((functions[parent], symbol))
+            dot_file.write(
+                f"    {identifiers[functions[parent]]} -> {identifiers[symbol]};\n"
+            )
+        node += 1
+
+    dot_file.write("}\n")
+
+
+def graph_size(tree: CallTree, kept_nodes: bytearray = None) -> tuple:
+    """Count the nodes and the edges of the dot graph of a tree, as written by write_dot.
+
+    Args:
+        tree (CallTree): tree to measure
+        kept_nodes (bytearray): (opt) mask of the nodes of a filtered view of the tree to measure
+
+    Returns:
+        tuple: the number of unique functions and the number of unique calls between them
+    """
+    functions = tree.functions
+    parents = tree.parents
+    symbols_seen = set()
+    edges_seen = set()
+
+    node = 0
+    while node < len(tree):
+        if kept_nodes is not None and not kept_nodes[node]:
+            node = tree.subtree_ends[node]
+            continue
+
+        symbols_seen.add(functions[node])
+        if parents[node] != -1:
+            edges_seen.add((functions[parents[node]], functions[node]))
+        node += 1
+
+    return len(symbols_seen), len(edges_seen)
+
+
+def select_engine(nodes: int, edges: int, engine: str = "auto") -> list:
+    """Select the Graphviz engine and its limits to lay out a graph in a bounded time.
+
+    dot gives the best layouts of trees but is superlinear: its optimization passes are limited
+    for medium graphs, and the largest graphs are laid out by a force-directed engine instead.
+
+    Args:
+        nodes (int): number of nodes of the graph
+        edges (int): number of edges of the graph
+        engine (str): (opt) 'auto' (default) to select the engine, or the engine to use
+
+    Returns:
+        list: the engine followed by its options, to start the command line of the layout
+    """
+    if engine != "auto":
+        return [engine]
+    if nodes + edges <= DOT_MAX_GRAPH_SIZE:
+        return ["dot"]
+    if nodes + edges <= LIMITED_DOT_MAX_GRAPH_SIZE:
+        return ["dot", *LIMITED_DOT_OPTIONS]
+    return [LARGE_GRAPH_ENGINE]
+
+
+def degrade_tree(tree: CallTree, kept_nodes: bytearray, level: int) -> tuple:
+    """Reduce a view of a tree to render it faster, more and more with the level.
+
+    Level 1 halves the depth of the view, level 2 also removes the calls executing less than
+    1% of the instructions of the root, level 3 also keeps only the 3 heaviest children of each call.
+
+    Args:
+        tree (CallTree): the full tree, with its subtrees indexed
+        kept_nodes (bytearray): mask of the nodes of the view to reduce, None for the full tree
+        level (int): level of degradation, from 1 to DEGRADATION_LEVELS
+
+    Returns:
+        tuple: the mask of the nodes of the reduced view and the description of the reductions
+    """
+    depths = tree.depths
+    nodes = [
+        node for node in range(len(tree)) if kept_nodes is None or kept_nodes[node]
+    ]
+    levels = max((depths[node] for node in nodes), default=0) - depths[0]
+    max_depth = depths[0] + max(1, levels // 2)
+
+    degraded_nodes = bytearray(len(tree))
+    for node in nodes:
+        if depths[node] <= max_depth:
+            degraded_nodes[node] = 1
+    reductions = [f"depth limited to {max_depth - depths[0]} levels"]
+
+    if level >= 2:
+        degraded_nodes = prune_tree(tree, degraded_nodes, tree.inclusive[0] // 100)
+        reductions.append("calls under 1% of the instructions removed")
+    if level >= 3:
+        degraded_nodes = prune_tree(tree, degraded_nodes, 0, 3)
+        reductions.append("3 heaviest children kept per call")
+
+    return degraded_nodes, ", ".join(reductions)
+
+
+class TeeWriter:
+    """Text stream writing everything it receives to several text files."""
+
+    __slots__ = ("files",)
+
+    def __init__(self, *files):
+        self.files = files
+
+    def write(self, text: str) -> None:
+        """Write a text to all the files."""
+        for file in self.files:
+            file.write(text)
+
+
+def generate_images(
+    directory_path: Path,
+    tree_type: str,
+    tree: CallTree,
+    direction: str,
+    kept_nodes: bytearray = None,
+    keep_dot: bool = False,
+    formats: Iterable[str] = ("png",),
+    engine: str = "auto",
+    timeout: float = None,
 ) -> None:
-    """Generate the png images of the resulting trees.
+    """Generate the images of the resulting trees.
+
+    The dot graph is streamed to the standard input of Graphviz, without temporary files, and
+    the images of all the formats are rendered from a single layout of the graph. When Graphviz
+    exceeds the timeout, it is killed and the tree is rendered again, reduced by degrade_tree.
 
     Args:
         directory_path (Path): path to the directory in which the results should be generated
-        tree (Tree): tree to convert into a .png
         tree_type (str): 'filtered_tree' or 'full_tree'
+        tree (CallTree): tree to convert into images
         direction (str): direction of the tree: 'LR' (default) or 'TB'
+        kept_nodes (bytearray): (opt) mask of the nodes of a filtered view of the tree to convert
+        keep_dot (bool): (opt) also write the dot graph in the directory, as {tree_type}.dot
+        formats (Iterable[str]): (opt) formats of the images: 'png' (default), 'svg', 'pdf'
+        engine (str): (opt) Graphviz engine: 'auto' (default) to select it by size of the graph
+        timeout (float): (opt) number of seconds given to Graphviz to render the tree
     """
-    lines_seen = []
-    tree_path = Path(directory_path, f"{tree_type}.png")
+    label = None
+    view_nodes = kept_nodes
+    for level in range(DEGRADATION_LEVELS + 1):
+        nodes, edges = graph_size(tree, view_nodes)
+        command = select_engine(nodes, edges, engine)
+        logging.info(
+            "Rendering %s (%d nodes, %d edges) with: [bright_cyan]%s[/]",
+            tree_type,
+            nodes,
+            edges,
+            " ".join(command),
+        )
+        for image_format in dict.fromkeys(formats):
+            tree_path = Path(directory_path, f"{tree_type}.{image_format}")
+            command.extend(("-T", image_format, "-o", str(tree_path)))
+
+        dot_path = Path(directory_path, f"{tree_type}.dot") if keep_dot else None
+        try:
+            run_graphviz(command, tree, direction, view_nodes, label, dot_path, timeout)
+            return
+        except subprocess.TimeoutExpired:
+            if level == DEGRADATION_LEVELS:
+                raise
+
+        view_nodes, reductions = degrade_tree(tree, kept_nodes, level + 1)
+        label = f"Reduced tree: {reductions}"
+        logging.warning(
+            "[-] Rendering of %s exceeded %s seconds, retrying with a reduced tree: %s.",
+            tree_type,
+            timeout,
+            reductions,
+        )
+
 
-    # Build the dot tree
-    dot_tree = DotExporter(
-        tree,
-        options=[f"rankdir={direction}"],
-        nodenamefunc=(lambda node: node.name),
-        nodeattrfunc=determine_node_att,
+def run_graphviz(
+    command: list,
+    tree: CallTree,
+    direction: str,
+    kept_nodes: bytearray = None,
+    label: str = None,
+    dot_path: Path = None,
+    timeout: float = None,
+) -> None:
+    """Run Graphviz on the dot graph of a tree, streamed to its standard input.
+
+    Args:
+        command (list): the command line of Graphviz
+        tree (CallTree): tree to render
+        direction (str): direction of the tree: 'LR' (default) or 'TB'
+        kept_nodes (bytearray): (opt) mask of the nodes of a filtered view of the tree to render
+        label (str): (opt) label of the graph, displayed on top of it
+        dot_path (Path): (opt) path of a file to also write the dot graph to
+        timeout (float): (opt) number of seconds after which Graphviz is killed
+
+    Raises:
+        subprocess.CalledProcessError: if Graphviz failed
+        subprocess.TimeoutExpired: if Graphviz exceeded the timeout
+    """
+    with subprocess.Popen(command, stdin=subprocess.PIPE, encoding="utf-8") as process:
+        try:
+            if dot_path is not None:
+                with open(dot_path, "w", encoding="utf-8") as dot_file:
+                    write_dot(
+                        TeeWriter(process.stdin, dot_file),
+                        tree,
+                        direction,
+                        kept_nodes,
+                        label,
+                    )
+            else:
+                write_dot(process.stdin, tree, direction, kept_nodes, label)
+            process.stdin.close()
+        except BrokenPipeError:  # dot exited early, its return code is checked below
+            with suppress(BrokenPipeError):  # Discard the rest of the graph
+                process.stdin.close()
+
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            raise
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+
+def render_trees(
+    directory_path: Path,
+    tree: CallTree,
+    views: dict,
+    direction: str,
+    keep_dot: bool = False,
+    jobs: int = 2,
+    formats: Iterable[str] = ("png",),
+    engine: str = "auto",
+    timeout: float = None,
+    backend: str = "graphviz",
+) -> None:
+    """Generate the images of several views of a tree concurrently.
+
+    Each view is rendered by its own dot process, at most jobs of them running at the same time.
+    The svg backend renders the views itself instead, as svg images only.
+
+    Args:
+        directory_path (Path): path to the directory in which the results should be generated
+        tree (CallTree): tree to convert into images
+        views (dict): tree type ('full_tree', 'filtered_tree'...) -> mask of its nodes, or None
+        direction (str): direction of the trees: 'LR' (default) or 'TB'
+        keep_dot (bool): (opt) also write the dot graphs in the directory
+        jobs (int): (opt) maximum number of trees rendered at the same time
+        formats (Iterable[str]): (opt) formats of the images: 'png' (default), 'svg', 'pdf'
+        engine (str): (opt) Graphviz engine: 'auto' (default) to select it by size of the graphs
+        timeout (float): (opt) number of seconds given to Graphviz to render each tree
+        backend (str): (opt) renderer of the trees: 'graphviz' (default) or 'svg'
+    """
+    if backend == "svg":
+        for tree_type, kept_nodes in views.items():
+            generate_svg(directory_path, tree_type, tree, direction, kept_nodes)
+        return
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        renders = [
+            executor.submit(
+                generate_images,
+                directory_path,
+                tree_type,
+                tree,
+                direction,
+                kept_nodes,
+                keep_dot,
+                formats,
+                engine,
+                timeout,
+            )
+            for tree_type, kept_nodes in views.items()
+        ]
+        for render in renders:
+            render.result()
+
+
+def tidy_tree_layout(
+    tree: CallTree, kept_nodes: bytearray, sizes: list, gap: float
+) -> array:
+    """Lay out a tree as a tidy tree, computing the position of each node along its level.
+
+    Implements the algorithm of Walker improved by Buchheim, Junger and Leipert to run in linear
+    time, iteratively: the subtrees are laid out from the last node to the root, then shifted
+    from the root to the last node. Parents are centered over their children, and subtrees are
+    placed as close as their contours allow.
+
+    Args:
+        tree (CallTree): the full tree
+        kept_nodes (bytearray): mask of the nodes of a filtered view of the tree, None for all
+        sizes (list): size of each node along its level
+        gap (float): minimum space between two neighbor nodes of a level
+
+    Returns:
+        array: position of the center of each node along its level, from 0
+    """
+    count = len(tree)
+    parents = tree.parents
+    children = [[] for _ in range(count)]
+    for node in range(1, count):
+        if kept_nodes is None or kept_nodes[node]:
+            children[parents[node]].append(node)
+
+    prelim = array("d", bytes(8 * count))
+    mod = array("d", bytes(8 * count))
+    shift = array("d", bytes(8 * count))
+    change = array("d", bytes(8 * count))
+    midpoint = array("d", bytes(8 * count))
+    number = array("i", bytes(4 * count))  # Index of each node among its siblings
+    thread = array("i", [-1]) * count
+    ancestor = array("i", range(count))
+
+    def next_left(node: int) -> int:
+        return children[node][0] if children[node] else thread[node]
+
+    def next_right(node: int) -> int:
+        return children[node][-1] if children[node] else thread[node]
+
+    def apportion(node: int, left_sibling: int, default_ancestor: int) -> int:
+        # Inner and outer contours, right of the left siblings and left of the node
+        inner_right = outer_right = node
+        inner_left = left_sibling
+        outer_left = children[parents[node]][0]
+        sum_inner_right = mod[inner_right]
+        sum_outer_right = mod[outer_right]
+        sum_inner_left = mod[inner_left]
+        sum_outer_left = mod[outer_left]
+
+        while next_right(inner_left) != -1 and next_left(inner_right) != -1:
+            inner_left = next_right(inner_left)
+            inner_right = next_left(inner_right)
+            outer_left = next_left(outer_left)
+            outer_right = next_right(outer_right)
+            ancestor[outer_right] = node
+            distance = (
+                prelim[inner_left]
+                + sum_inner_left
+                - prelim[inner_right]
+                - sum_inner_right
+                + (sizes[inner_left] + sizes[inner_right]) / 2
+                + gap
+            )
+            if distance > 0:
+                left_ancestor = ancestor[inner_left]
+                if parents[left_ancestor] != parents[node]:
+                    left_ancestor = default_ancestor
+
+                # Move the subtree, spreading the shift over the siblings in between
+                subtrees = number[node] - number[left_ancestor]
+                change[node] -= distance / subtrees
+                shift[node] += distance
+                change[left_ancestor] += distance / subtrees
+                prelim[node] += distance
+                mod[node] += distance
+                sum_inner_right += distance
+                sum_outer_right += distance
+
+            sum_inner_left += mod[inner_left]
+            sum_inner_right += mod[inner_right]
+            sum_outer_left += mod[outer_left]
+            sum_outer_right += mod[outer_right]
+
+        if next_right(inner_left) != -1 and next_right(outer_right) == -1:
+            thread[outer_right] = next_right(inner_left)
+            mod[outer_right] += sum_inner_left - sum_outer_right
+        if next_left(inner_right) != -1 and next_left(outer_left) == -1:
+            thread[outer_left] = next_left(inner_right)
+            mod[outer_left] += sum_inner_right - sum_outer_left
+            default_ancestor = node
+
+        return default_ancestor
+
+    # First walk: children being numbered after their parent, the subtrees of the
+    # children of a node are all laid out when the node is reached in reverse order
+    for node in range(count - 1, -1, -1):
+        if kept_nodes is not None and not kept_nodes[node]:
+            continue
+        if not children[node]:
+            continue
+
+        default_ancestor = children[node][0]
+        for index, child in enumerate(children[node]):
+            number[child] = index
+            if index == 0:
+                prelim[child] = midpoint[child]
+                continue
+
+            left_sibling = children[node][index - 1]
+            prelim[child] = (
+                prelim[left_sibling] + (sizes[left_sibling] + sizes[child]) / 2 + gap
+            )
+            if children[child]:
+                mod[child] = prelim[child] - midpoint[child]
+            default_ancestor = apportion(child, left_sibling, default_ancestor)
+
+        # Execute the shifts of the children stored by apportion
+        total_shift = total_change = 0.0
+        for child in reversed(children[node]):
+            prelim[child] += total_shift
+            mod[child] += total_shift
+            total_change += change[child]
+            total_shift += shift[child] + total_change
+
+        midpoint[node] = (prelim[children[node][0]] + prelim[children[node][-1]]) / 2
+    prelim[0] = midpoint[0]
+
+    # Second walk: sum the modifiers of the ancestors, parents being numbered first
+    positions = array("d", bytes(8 * count))
+    mod_sums = array("d", bytes(8 * count))
+    for node in range(count):
+        if kept_nodes is not None and not kept_nodes[node]:
+            continue
+
+        positions[node] = prelim[node] + mod_sums[node]
+        for child in children[node]:
+            mod_sums[child] = mod_sums[node] + mod[node]
+
+    lowest = min(
+        positions[node] - sizes[node] / 2
+        for node in range(count)
+        if kept_nodes is None or kept_nodes[node]
     )
+    for node in range(count):
+        positions[node] -= lowest
 
-    with open(f"{tree_type}.dot", "w+", encoding="utf-8") as dot_file:
-        # Filter duplicates
-        for line in dot_tree:
-            if line not in lines_seen:
-                dot_file.write(line)
-                lines_seen.append(line)
+    return positions
 
-    # Convert .dot tree to .png
-    subprocess.run(
-        f'dot {tree_type}.dot -T png -o "{tree_path}"', shell=False, check=True
+
+def write_svg(
+    svg_file, tree: CallTree, direction: str, kept_nodes: bytearray = None
+) -> None:
+    """Write a tree as an svg image laid out as a tidy tree, each call being a node of the tree.
+
+    Args:
+        svg_file: text file to write the image to
+        tree (CallTree): tree to write
+        direction (str): direction of the tree: 'LR' (default) or 'TB'
+        kept_nodes (bytearray): (opt) mask of the nodes of a filtered view of the tree to write
+    """
+    count = len(tree)
+    depths = tree.depths
+    nodes = [node for node in range(count) if kept_nodes is None or kept_nodes[node]]
+    if not nodes:
+        svg_file.write(
+            '<svg xmlns="http://www.w3.org/2000/svg" width="0" height="0"/>\n'
+        )
+        return
+
+    widths = [0.0] * count
+    for node in nodes:
+        widths[node] = len(tree.name(node)) * SVG_CHAR_WIDTH + 2 * SVG_BOX_PADDING
+
+    # Levels are columns as wide as their largest node (LR) or rows of same height (TB)
+    levels = max(depths[node] for node in nodes) - depths[0] + 1
+    if direction == "LR":
+        positions = tidy_tree_layout(
+            tree, kept_nodes, [SVG_BOX_HEIGHT] * count, SVG_SIBLING_GAP
+        )
+        level_sizes = [0.0] * levels
+        for node in nodes:
+            level = depths[node] - depths[0]
+            level_sizes[level] = max(level_sizes[level], widths[node])
+    else:
+        positions = tidy_tree_layout(tree, kept_nodes, widths, SVG_SIBLING_GAP)
+        level_sizes = [SVG_BOX_HEIGHT] * levels
+
+    level_starts = [0.0] * levels
+    for level in range(1, levels):
+        level_starts[level] = (
+            level_starts[level - 1] + level_sizes[level - 1] + SVG_LEVEL_GAP
+        )
+
+    # Top left corner of the box of each node
+    boxes = {}
+    for node in nodes:
+        level = depths[node] - depths[0]
+        if direction == "LR":
+            boxes[node] = (level_starts[level], positions[node] - SVG_BOX_HEIGHT / 2)
+        else:
+            boxes[node] = (positions[node] - widths[node] / 2, level_starts[level])
+
+    width = max(boxes[node][0] + widths[node] for node in nodes)
+    height = max(boxes[node][1] + SVG_BOX_HEIGHT for node in nodes)
+    svg_file.write(
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        f'width="{width:.0f}" height="{height:.0f}" viewBox="0 0 {width:.1f} {height:.1f}" '
+        f'font-family="monospace" font-size="{SVG_FONT_SIZE}">\n'
     )
 
+    # Edges from the middle of the side of the parents to the side of the children
+    svg_file.write('<g fill="none" stroke="black">\n')
+    for node in nodes[1:]:
+        parent = tree.parents[node]
+        parent_x, parent_y = boxes[parent]
+        x, y = boxes[node]
+        if direction == "LR":
+            start_x = parent_x + widths[parent]
+            start_y = parent_y + SVG_BOX_HEIGHT / 2
+            end_y = y + SVG_BOX_HEIGHT / 2
+            path = f"M{start_x:.1f},{start_y:.1f}H{(start_x + x) / 2:.1f}V{end_y:.1f}H{x:.1f}"
+        else:
+            start_x = parent_x + widths[parent] / 2
+            start_y = parent_y + SVG_BOX_HEIGHT
+            end_x = x + widths[node] / 2
+            path = f"M{start_x:.1f},{start_y:.1f}V{(start_y + y) / 2:.1f}H{end_x:.1f}V{y:.1f}"
+        svg_file.write(f'<path d="{path}"/>\n')
+    svg_file.write("</g>\n")
+
+    for node in nodes:
+        x, y = boxes[node]
+        name = html.escape(tree.name(node))
+        svg_file.write(
+            f"<g><title>{name} ({tree.inclusive[node]} instructions)</title>"
+            f'<rect x="{x:.1f}" y="{y:.1f}" width="{widths[node]:.1f}" '
+            f'height="{SVG_BOX_HEIGHT}" fill="{determine_node_color(tree.functions[node])}" '
+            'stroke="black"/>'
+            f'<text x="{x + SVG_BOX_PADDING:.1f}" y="{y + SVG_BOX_HEIGHT / 2:.1f}" '
+            f'dominant-baseline="central">{name}</text></g>\n'
+        )
+    svg_file.write("</svg>\n")
+
+
+def generate_svg(
+    directory_path: Path,
+    tree_type: str,
+    tree: CallTree,
+    direction: str,
+    kept_nodes: bytearray = None,
+) -> None:
+    """Generate the svg image of a resulting tree, without Graphviz.
+
+    Args:
+        directory_path (Path): path to the directory in which the results should be generated
+        tree_type (str): 'filtered_tree' or 'full_tree'
+        tree (CallTree): tree to convert into an svg image
+        direction (str): direction of the tree: 'LR' (default) or 'TB'
+        kept_nodes (bytearray): (opt) mask of the nodes of a filtered view of the tree to convert
+    """
+    logging.info("Rendering %s with: [bright_cyan]tidy tree layout[/]", tree_type)
+    with open(
+        Path(directory_path, f"{tree_type}.svg"), "w", encoding="utf-8"
+    ) as svg_file:
+        write_svg(svg_file, tree, direction, kept_nodes)
+
 
 def parse_arguments() -> argparse.Namespace:
     """Parse, validate and procces arguments.
@@ -293,15 +1889,80 @@ def parse_arguments() -> argparse.Namespace:
         action="store_true",
         help="Display the resulting filtered tree in console.",
     )
+    parser.add_argument(
+        "--format",
+        dest="formats",
+        metavar="format",
+        nargs="+",
+        choices=["png", "svg", "pdf"],
+        help="Defines the formats of the resulting trees: png (default) | svg | pdf. Ex: --format png svg",
+        default=None,
+    )
+    parser.add_argument(
+        "--backend",
+        dest="backend",
+        metavar="backend",
+        help="""Defines the renderer of the trees: graphviz (default) | svg.
+        "svg" lays out the trees itself and writes svg images, without Graphviz: the options
+        --format, --engine, --render-timeout and --keep-dot are then not allowed.""",
+        choices=["graphviz", "svg"],
+        default="graphviz",
+    )
+    parser.add_argument(
+        "--engine",
+        dest="engine",
+        metavar="engine",
+        help="""Defines the Graphviz engine laying out the trees: auto (default) | dot | sfdp | twopi.
+        "auto" selects dot, with limited optimizations for large trees, or sfdp for huge trees.""",
+        choices=["auto", "dot", "sfdp", "twopi"],
+        default="auto",
+    )
+    parser.add_argument(
+        "--render-timeout",
+        dest="render_timeout",
+        metavar="seconds",
+        default=None,
+        type=float,
+        help="""Kills Graphviz after the given number of seconds and renders the tree again, reduced.
+        The tree is reduced up to 3 times: depth halved, cheap calls removed, heaviest children kept.""",
+    )
+    parser.add_argument(
+        "--keep-dot",
+        dest="keep_dot",
+        action="store_true",
+        help="Also writes the dot graphs of the trees in the output directory.",
+    )
+    parser.add_argument(
+        "-s",
+        "--stats",
+        dest="stats_mode",
+        action="store_true",
+        help="Only displays in console the per-function statistics of the wt summary, without generating the trees.",
+    )
     parser.add_argument(
         "-d",
         "--depth",
         dest="depth_level",
-        metavar="1-9",
-        default=9,
+        metavar="depth",
+        default=None,
         type=int,
-        choices=range(1, 10),
-        help="Defines the depth level of filtering between 1 and 9. Default: 9.",
+        help="Defines the maximum depth level of the calls to parse. Default: no limit.",
+    )
+    parser.add_argument(
+        "-m",
+        "--mmap",
+        dest="memory_map",
+        action="store_true",
+        help="Memory-maps the input file and parses it as bytes instead of text.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        metavar="jobs",
+        default=1,
+        type=int,
+        help="Parses the input file with the given number of processes. Default: 1.",
     )
     parser.add_argument(
         "-o",
@@ -339,11 +2000,97 @@ def parse_arguments() -> argparse.Namespace:
         dest="filters_words",
         metavar="filters_words",
         nargs="+",
-        help="Adds a list of custom filters. Ex: -a  cmp memcpy",
+        help="""Adds a list of custom filters. Ex: -a  cmp memcpy
+        Filters with wildcards match whole names, or whole function names without module.
+        Ex: -a ntdll!Rtlp* *Heap""",
+        default=[],
+    )
+    parser.add_argument(
+        "-r",
+        "--filter-regex",
+        dest="regex_filters",
+        metavar="regex_filters",
+        nargs="+",
+        help="Adds a list of custom filters as regexes searched in the names. Ex: -r ^ntdll!Rtl.*Heap$",
+        default=[],
+    )
+    parser.add_argument(
+        "--focus",
+        dest="focus_words",
+        metavar="focus_words",
+        nargs="+",
+        help="""Keeps only the call paths leading to the functions matching these names.
+        Same syntax as the filters. Ex: --focus NtCreateFile CreateHardLinkW""",
         default=[],
     )
+    parser.add_argument(
+        "--focus-subtree",
+        dest="focus_subtree",
+        help="Keeps as well the subtrees of the functions matched by --focus.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--min-inclusive",
+        dest="min_inclusive",
+        metavar="instructions",
+        default=0,
+        type=int,
+        help="Removes the calls executing less instructions, children included. Ex: --min-inclusive 1000",
+    )
+    parser.add_argument(
+        "--top-k-children",
+        dest="top_k_children",
+        metavar="K",
+        default=None,
+        type=int,
+        help="Keeps only the K children executing the most instructions for each call. Default: all.",
+    )
+    parser.add_argument(
+        "--render-jobs",
+        dest="render_jobs",
+        metavar="jobs",
+        default=2,
+        type=int,
+        help="Renders the given number of trees at the same time with Graphviz. Default: 2.",
+    )
     args = parser.parse_args()
 
+    if args.depth_level is not None and args.depth_level < 1:
+        parser.error("argument -d/--depth: the depth level must be at least 1.")
+    if args.jobs < 1:
+        parser.error("argument -j/--jobs: the number of processes must be at least 1.")
+    if args.render_timeout is not None and args.render_timeout <= 0:
+        parser.error("argument --render-timeout: the timeout must be positive.")
+    if args.render_jobs < 1:
+        parser.error(
+            "argument --render-jobs: the number of renders must be at least 1."
+        )
+    if args.min_inclusive < 0:
+        parser.error(
+            "argument --min-inclusive: the number of instructions cannot be negative."
+        )
+    if args.top_k_children is not None and args.top_k_children < 1:
+        parser.error(
+            "argument --top-k-children: the number of children must be at least 1."
+        )
+    try:
+        compile_filter_patterns(args.regex_filters)
+    except re.error as e:
+        parser.error(f"argument -r/--filter-regex: invalid regex {e.pattern}: {e}.")
+    if args.backend == "svg":
+        # These options only apply to the rendering with Graphviz
+        if args.formats is not None and set(args.formats) != {"svg"}:
+            parser.error("argument --format: the svg backend only writes svg images.")
+        if args.engine != "auto":
+            parser.error("argument --engine: not allowed with the svg backend.")
+        if args.render_timeout is not None:
+            parser.error("argument --render-timeout: not allowed with the svg backend.")
+        if args.keep_dot:
+            parser.error("argument --keep-dot: not allowed with the svg backend.")
+        args.formats = ["svg"]
+    elif args.formats is None:
+        args.formats = ["png"]
+
     if not Path(args.input_file).exists():
         raise FileNotFoundError(f"Couldn't find the file: {args.input_file}.")
 
@@ -398,35 +2145,109 @@ if __name__ == "__main__":
 
         parameters = f"""> Processing wt result with the following parameters:
 |_ Input file:          [magenta]{p_args.input_file}[/]
-|_ Depth level:         {p_args.depth_level}
+|_ Depth level:         {p_args.depth_level or "no limit"}
+|_ Parsing processes:       {p_args.jobs}
+|_ Concurrent renders:      {p_args.render_jobs}
 |_ Filter words:        {p_args.filters_words}
+|_ Filter regexes:      {p_args.regex_filters}
+|_ Focus on:            {p_args.focus_words or "all functions"}
+|_ Minimum instructions:    {p_args.min_inclusive}
+|_ Children per call:       {p_args.top_k_children or "all"}
 |_ Print in terminal:       {p_args.console_mode}
 |_ Direction of trees:      [bright_cyan]{p_args.direction}[/]
+|_ Renderer of trees:       {p_args.backend}
+|_ Formats of trees:        {p_args.formats}
+|_ Graphviz engine:         {p_args.engine}
+|_ Render timeout:          {p_args.render_timeout or "none"}
 |_ Export results in:       [magenta]{p_args.requested_dir}[/]
+|_ Keep dot graphs:         {p_args.keep_dot}
 
     """
         logger.info(parameters)
 
-        wt_input = parse_input_file(p_args.input_file, p_args.depth_level)
-        logger.info("> Parsing of wt output...  [green3]OK[/]")
+        if p_args.stats_mode is True:
+            wt_summary = parse_summary(p_args.input_file)
+            if wt_summary is None:
+                raise ValueError(
+                    f"Couldn't find the wt summary in input file:{p_args.input_file}."
+                )
+            display_stats_report(wt_summary)
 
-        full_tree = generate_tree(wt_input, None)
-        filtered_tree = generate_tree(wt_input, p_args.filters_words)
-        logger.info("> Creation of the trees...     [green3]OK[/]")
+        else:
+            full_tree, filtered_nodes = generate_tree(
+                parse_input_file(
+                    p_args.input_file,
+                    p_args.depth_level,
+                    p_args.memory_map,
+                    p_args.jobs,
+                ),
+                p_args.filters_words,
+                p_args.regex_filters,
+            )
+            logger.info(
+                "> Parsing of wt output and creation of the trees...    [green3]OK[/]"
+            )
 
-        generate_png(p_args.requested_dir, "full_tree", full_tree, p_args.direction)
-        generate_png(
-            p_args.requested_dir, "filtered_tree", filtered_tree, p_args.direction
-        )
-        logger.info("> Generation of the pngs...    [green3]OK[/]")
+            full_nodes = None
+            if p_args.focus_words:
+                full_nodes = focus_tree(
+                    full_tree, p_args.focus_words, None, p_args.focus_subtree
+                )
+                focused_nodes = focus_tree(
+                    full_tree, p_args.focus_words, filtered_nodes, p_args.focus_subtree
+                )
+                if not any(full_nodes):
+                    full_nodes = None
+                    logging.warning(
+                        "[-] No function matches the focus words: %s. Keeping whole trees.",
+                        p_args.focus_words,
+                    )
+                else:
+                    if not any(focused_nodes):
+                        # The filtered tree keeps only its root, to stay focused
+                        focused_nodes[0] = filtered_nodes[0]
+                        logging.warning(
+                            "[-] The functions matching the focus words are all filtered "
+                            "out: the filtered tree only keeps its root."
+                        )
+                    filtered_nodes = focused_nodes
+
+            if p_args.min_inclusive or p_args.top_k_children is not None:
+                full_nodes = prune_tree(
+                    full_tree, full_nodes, p_args.min_inclusive, p_args.top_k_children
+                )
+                filtered_nodes = prune_tree(
+                    full_tree,
+                    filtered_nodes,
+                    p_args.min_inclusive,
+                    p_args.top_k_children,
+                )
+
+            wt_summary = parse_summary(p_args.input_file)
+            if wt_summary is not None:
+                check_summary_totals(wt_summary, full_tree)
+
+            render_trees(
+                p_args.requested_dir,
+                full_tree,
+                {"full_tree": full_nodes, "filtered_tree": filtered_nodes},
+                p_args.direction,
+                p_args.keep_dot,
+                p_args.render_jobs,
+                p_args.formats,
+                p_args.engine,
+                p_args.render_timeout,
+                p_args.backend,
+            )
+            logger.info("> Generation of the images...    [green3]OK[/]")
 
-        if p_args.console_mode is True:
-            display_console_tree(filtered_tree)
+            if p_args.console_mode is True:
+                display_console_tree(full_tree, filtered_nodes)
 
-        logging.info(
-            "[+] [green3]Success![/] Trees have been generated in: \n[magenta]%s[/].",
-            p_args.requested_dir,
-        )
+            logging.info(
+                "[+] [green3]Success![/] Trees have been generated in: \n[magenta]%s[/].",
+                p_args.requested_dir,
+            )
 
     except FileNotFoundError as e:
         RETURN_CODE = 1
@@ -438,6 +2259,13 @@ if __name__ == "__main__":
         logging.exception("[-] Error: %s", e)
         logging.warning("[red]Please check the input file's format.[/]")
 
+    except subprocess.TimeoutExpired as e:
+        RETURN_CODE = 1
+        logging.exception("[-] Error: %s", e)
+        logging.warning(
+            "[red]Please increase the render timeout or filter the trees further.[/]"
+        )
+
     except subprocess.CalledProcessError as e:
         RETURN_CODE = 1
         logging.exception("[-] Error executing dot:\n %s", e)
@@ -445,11 +2273,4 @@ if __name__ == "__main__":
             "[red]Please verify Graphiz is installed and present in PATH.[/]"
         )
 
-    finally:
-        # Clean temporary files
-        if Path("full_tree.dot").exists():
-            Path.unlink(Path("full_tree.dot"))
-        if Path("filtered_tree.dot").exists():
-            Path.unlink(Path("filtered_tree.dot"))
-
     sys.exit(RETURN_CODE)